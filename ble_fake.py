@@ -0,0 +1,181 @@
+import asyncio
+import sys
+import time
+from array import array
+import numpy as np
+from ble_service import BLEService, SampleRing, parse_controller_packet, pack_controller_packet
+
+# ─────────────────────────────────────────────────────────────────────────────
+# In-process simulated BLE controller, for offline load and latency testing
+class FakePeripheral:
+    """A controller that emits knob notifications on the service event loop.
+
+    rate_hz   samples per second (10 Hz - 2 kHz is the useful range)
+    jitter    standard deviation of the send interval, as a fraction of it
+    burst     samples packed into one notification (binary format only)
+    pause     (on_s, off_s): send for on_s seconds, then go quiet for off_s
+    latency   simulated radio delay in seconds before the handler is called
+    binary    send binary packets instead of the "[a,b,c,d]" text format
+    rssi      value reported by discovery
+
+    Every sample's send time (time.perf_counter) is appended to `sent`, in
+    order, so a consumer can match received samples to their send times.
+    """
+
+    def __init__(self, name="Fake Controller", address="FA:KE:00:00:00:01", rate_hz=100.0,
+                 jitter=0.0, burst=1, pause=None, binary=True, latency=0.0, rssi=-40, seed=0):
+        self.name = name
+        self.address = address
+        self.rate_hz = float(rate_hz)
+        self.jitter = jitter
+        self.burst = max(1, int(burst)) if binary else 1
+        self.pause = pause
+        self.binary = binary
+        self.latency = latency
+        self.rssi = rssi
+        self.available = True  # set False to make connects fail (out of range)
+        self.clients = []
+        self.rng = np.random.default_rng(seed)
+        self.sent = array('d')
+
+    def sample(self, t):
+        """Knob values at time t: slow circles on both sticks."""
+        return (0.6*np.sin(t), 0.6*np.cos(t), 0.3*np.sin(0.5*t), 0.3*np.cos(0.7*t))
+
+    def encode(self, t):
+        if self.binary:
+            return pack_controller_packet(*self.sample(t))
+        return ("[" + ",".join(f"{v*100:.0f}" for v in self.sample(t)) + "]").encode()
+
+    async def run(self, handler, sender="fake"):
+        """Send notifications to handler until cancelled."""
+        loop = asyncio.get_running_loop()
+        interval = self.burst/self.rate_hz
+        start = next_t = time.perf_counter()
+        while True:
+            if self.jitter:
+                next_t += max(0.0, interval*(1+self.jitter*self.rng.standard_normal()))
+            else:
+                next_t += interval
+            delay = next_t-time.perf_counter()
+            # When behind schedule, still yield so the loop keeps serving other jobs
+            await asyncio.sleep(max(delay, 0))
+            if self.pause:
+                on_s, off_s = self.pause
+                if (next_t-start) % (on_s+off_s) >= on_s:
+                    continue
+            now = time.perf_counter()
+            data = b"".join(self.encode(now-start) for _ in range(self.burst))
+            self.sent.extend([now]*self.burst)
+            if self.latency:
+                loop.call_later(self.latency, handler, sender, bytearray(data))
+            else:
+                handler(sender, bytearray(data))
+
+class FakeClient:
+    """Mimics the part of BleakClient that BLEService uses."""
+
+    def __init__(self, peripheral, disconnected_callback=None):
+        self.peripheral = peripheral
+        self.disconnected_callback = disconnected_callback
+        self.is_connected = False
+        self._task = None
+
+    async def connect(self):
+        await asyncio.sleep(0)
+        if not self.peripheral.available:
+            raise ConnectionError(f"Device {self.peripheral.address} not available")
+        self.is_connected = True
+        self.peripheral.clients.append(self)
+
+    async def start_notify(self, uuid, handler):
+        self._task = asyncio.get_running_loop().create_task(self.peripheral.run(handler))
+
+    async def disconnect(self):
+        self.drop()
+
+    def drop(self):
+        """End the link from the peripheral side (call on the service loop)."""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self in self.peripheral.clients:
+            self.peripheral.clients.remove(self)
+        was_connected, self.is_connected = self.is_connected, False
+        if was_connected and self.disconnected_callback:
+            self.disconnected_callback(self)
+
+class FakeTransport:
+    """Transport for BLEService backed by FakePeripheral objects."""
+
+    def __init__(self, peripherals=None, scan_delay=0.05):
+        self.peripherals = {p.address: p for p in (peripherals or [FakePeripheral()])}
+        self.scan_delay = scan_delay
+
+    async def discover(self):
+        await asyncio.sleep(self.scan_delay)
+        return [{"name": p.name, "address": p.address, "rssi": p.rssi}
+                for p in self.peripherals.values()]
+
+    def client(self, address, disconnected_callback):
+        if address not in self.peripherals:
+            raise ConnectionError(f"Device {address} not found")
+        return FakeClient(self.peripherals[address], disconnected_callback)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Benchmark: fake controller -> BLEService -> notification handler -> ring buffer
+def run_benchmark(rate_hz=1000, seconds=3.0, frame_hz=20, **peripheral_kwargs):
+    """Measure pipeline throughput and latency against a FakePeripheral.
+
+    A consumer drains the ring at frame_hz like the simulator's update().
+    Latencies are in milliseconds: send -> handler (delivery) and
+    send -> drain (end to end, what update() sees).
+    """
+    peripheral = FakePeripheral(rate_hz=rate_hz, **peripheral_kwargs)
+    ring = SampleRing(capacity=65536)
+
+    def handler(sender, data):
+        samples = parse_controller_packet(data)
+        if samples is not None:
+            ring.push(time.perf_counter(), samples)
+
+    service = BLEService("fake", handler, transport=FakeTransport([peripheral]))
+    try:
+        service.scan().result(5)
+        service.connect(service.devices[0]).result(5)
+        received = []
+        drained_at = []
+        start = time.perf_counter()
+        while time.perf_counter()-start < seconds:
+            time.sleep(1.0/frame_hz)
+            samples = ring.drain()
+            received.append(samples[:,0])
+            drained_at.append(np.full(len(samples), time.perf_counter()))
+        service.disconnect().result(5)
+        samples = ring.drain()
+        received.append(samples[:,0]); drained_at.append(np.full(len(samples), time.perf_counter()))
+        elapsed = time.perf_counter()-start
+    finally:
+        service.shutdown()
+
+    recv = np.concatenate(received)
+    drained = np.concatenate(drained_at)
+    sent = np.frombuffer(peripheral.sent, dtype=float)[:len(recv)]
+    stats = {'rate_hz': rate_hz, 'sent': len(peripheral.sent), 'received': len(recv),
+             'dropped': ring.dropped, 'throughput_hz': len(recv)/elapsed}
+    for name, lat in (('delivery', recv-sent), ('end_to_end', drained-sent)):
+        if len(lat):
+            p50, p95, p99 = np.percentile(lat*1000, [50, 95, 99])
+            stats[name] = {'p50': p50, 'p95': p95, 'p99': p99, 'max': lat.max()*1000}
+    return stats
+
+if __name__ == "__main__":
+    rates = [float(r) for r in sys.argv[1:]] or [10, 100, 500, 1000, 2000]
+    print(f"{'rate':>6} {'sent':>7} {'recv':>7} {'drop':>5} {'thru/s':>8}  "
+          f"{'deliv p50/p99 ms':>17}  {'e2e p50/p95/p99 ms':>20}")
+    for rate in rates:
+        s = run_benchmark(rate_hz=rate, seconds=2.0)
+        d, e = s.get('delivery', {}), s.get('end_to_end', {})
+        print(f"{rate:6.0f} {s['sent']:7d} {s['received']:7d} {s['dropped']:5d} {s['throughput_hz']:8.0f}  "
+              f"{d.get('p50', 0):8.2f}/{d.get('p99', 0):<8.2f}  "
+              f"{e.get('p50', 0):6.1f}/{e.get('p95', 0):6.1f}/{e.get('p99', 0):<6.1f}")
@@ -0,0 +1,378 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import numpy as np
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Controller packets
+# Binary packet: magic byte 0xA5 followed by four little-endian int16 values
+# (knob2 x, knob2 y, knob1 x, knob1 y) in hundredths.  A notification may carry
+# several packets back to back.  Anything else is parsed as the text format
+# "[a,b,c,d]" with the same channel order and scale.
+PACKET_MAGIC = 0xA5
+PACKET_DTYPE = np.dtype([('magic', 'u1'), ('values', '<i2', (4,))])
+
+def parse_controller_packet(data):
+    """Return an (n,4) array of knob samples from one notification, or None."""
+    data = bytes(data)
+    if data and data[0] == PACKET_MAGIC and len(data) % PACKET_DTYPE.itemsize == 0:
+        packets = np.frombuffer(data, dtype=PACKET_DTYPE)
+        if (packets['magic'] == PACKET_MAGIC).all():
+            return packets['values'] / 100.0
+    try:
+        text = data.decode('utf-8').strip()
+        if text.startswith('[') and text.endswith(']'):
+            vals = [float(p) for p in (p.strip() for p in text[1:-1].split(',')) if p]
+            while len(vals) < 4: vals.append(0.0)
+            return np.array([vals[:4]]) / 100.0
+    except ValueError:
+        pass
+    return None
+
+def pack_controller_packet(knob2_x, knob2_y, knob1_x, knob1_y):
+    """Encode one sample (knob units, -1..1) as a binary controller packet."""
+    packet = np.zeros(1, dtype=PACKET_DTYPE)
+    packet['magic'] = PACKET_MAGIC
+    packet['values'] = np.round(np.array([knob2_x, knob2_y, knob1_x, knob1_y]) * 100)
+    return packet.tobytes()
+
+class SampleRing:
+    """Timestamped controller samples from one producer to one consumer.
+
+    Rows are [t, knob2 x, knob2 y, knob1 x, knob1 y].  The producer writes the
+    rows and then publishes them by advancing `head`; the consumer copies
+    everything between its `tail` and `head`.  Neither side takes a lock.  If
+    the consumer falls more than `capacity` samples behind, the oldest ones are
+    dropped and counted in `dropped`.
+    """
+
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.data = np.zeros((capacity, 5))
+        self.head = 0
+        self.tail = 0
+        self.dropped = 0
+
+    def push(self, t, samples):
+        head = self.head
+        idx = np.arange(head, head + len(samples)) % self.capacity
+        self.data[idx, 0] = t
+        self.data[idx, 1:] = samples
+        self.head = head + len(samples)
+
+    def drain(self):
+        """Return (and consume) all samples published since the last drain."""
+        head = self.head
+        lost = max(0, head - self.capacity - self.tail)
+        tail = self.tail + lost
+        out = self.data[np.arange(tail, head) % self.capacity]
+        # Rows the producer overwrote while we were copying are stale
+        overrun = self.head - self.capacity - tail
+        if overrun > 0:
+            out = out[overrun:]
+            lost += overrun
+        self.dropped += lost
+        self.tail = head
+        return out
+
+    def clear(self):
+        self.tail = self.head
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Transports: where BLEService gets devices and clients from.  A transport has
+#   async discover() -> [{"name", "address", "rssi"}, ...]
+#   client(address, disconnected_callback) -> object with the BleakClient calls
+#     BLEService uses: connect(), is_connected, start_notify(), disconnect()
+# See ble_fake.py for an in-process simulated controller.
+class BleakTransport:
+    """Real Bluetooth LE through bleak (imported on first use)."""
+
+    async def discover(self):
+        from bleak import BleakScanner
+        found = await BleakScanner.discover(return_adv=True)
+        return [{"name": d.name, "address": d.address, "rssi": adv.rssi}
+                for d, adv in found.values() if d.name]
+
+    def client(self, address, disconnected_callback):
+        from bleak import BleakClient
+        return BleakClient(address, timeout=10.0, disconnected_callback=disconnected_callback)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Known devices, persisted between runs
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".pydrone", "known_devices.json")
+
+class DeviceCache:
+    """Name, address, last RSSI and last successful connection of known devices.
+
+    Stored as JSON at `path`; written atomically after every change.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self.last_address = None
+        self.known = {}
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            self.last_address = data.get("last_address")
+            self.known = {d["address"]: d for d in data.get("devices", [])}
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+    def devices(self):
+        """Known devices, most recently used first."""
+        return sorted(self.known.values(), key=lambda d: d.get("last_success") or 0, reverse=True)
+
+    def last_device(self):
+        return self.known.get(self.last_address)
+
+    def seen(self, devices):
+        now = time.time()
+        for dev in devices:
+            entry = self.known.setdefault(dev["address"], {"address": dev["address"], "last_success": None})
+            entry.update(name=dev["name"], rssi=dev.get("rssi"), last_seen=now)
+        self.save()
+
+    def connected(self, dev):
+        entry = self.known.setdefault(dev["address"], {"address": dev["address"], "rssi": dev.get("rssi")})
+        entry.update(name=dev["name"], last_success=time.time())
+        self.last_address = dev["address"]
+        self.save()
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump({"last_address": self.last_address, "devices": list(self.known.values())}, f, indent=1)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Long-lived Bluetooth service: one thread, one event loop, every BLE job on it
+class BLEService:
+    """Runs scan / connect / disconnect jobs on a single persistent event loop.
+
+    The service is a small connection pool: several controllers may be
+    connected at once (up to max_connections), each with its own client
+    created, used and disconnected on the service loop.  Notifications reach
+    notification_handler(address, data), so one handler can tell the
+    controllers apart.  Connection state is read through the thread-safe
+    properties below; the optional callbacks are invoked from the service
+    thread.
+
+    With a DeviceCache, quick_start() connects to the last used controller
+    straight away while discovery runs alongside.  If an established link
+    drops without disconnect() being called, the service reconnects with
+    exponential backoff (reconnect_delays) until it succeeds or the user
+    disconnects that device.
+    """
+
+    def __init__(self, notify_uuid, notification_handler,
+                 on_devices=None, on_connected=None, on_disconnected=None, transport=None,
+                 cache=None, auto_reconnect=True, reconnect_delays=(0.5, 10.0), max_connections=4):
+        self.transport = transport or BleakTransport()
+        self.notify_uuid = notify_uuid
+        self.notification_handler = notification_handler
+        self.on_devices = on_devices
+        self.on_connected = on_connected
+        self.on_disconnected = on_disconnected
+        self.cache = cache
+        self.auto_reconnect = auto_reconnect
+        self.reconnect_delays = reconnect_delays
+        self.max_connections = max_connections
+
+        self._lock = threading.Lock()
+        self._links = {}    # address -> (device, client), connected only
+        self._wanted = {}   # address -> device the user asked to be connected to
+        self._devices = cache.devices() if cache else []
+        self._status_text = "Bluetooth: Not connected"
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name="ble-service", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+        self.loop.close()
+
+    # ── thread-safe state ────────────────────────────────────────────────────
+    @property
+    def is_connected(self):
+        with self._lock:
+            return bool(self._links)
+
+    @property
+    def connected_devices(self):
+        with self._lock:
+            return [dev for dev, _ in self._links.values()]
+
+    @property
+    def status_text(self):
+        with self._lock:
+            return self._status_text
+
+    @status_text.setter
+    def status_text(self, text):
+        self._set(status_text=text)
+
+    @property
+    def devices(self):
+        with self._lock:
+            return list(self._devices)
+
+    def _set(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, '_' + name, value)
+
+    def _connected_status(self):
+        names = [dev["name"] for dev in self.connected_devices]
+        return f"Connected: {', '.join(names)}" if names else "Disconnected"
+
+    # ── job submission (callable from any thread) ────────────────────────────
+    def submit(self, coro):
+        """Schedule coro on the service loop and return a concurrent Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def scan(self):
+        return self.submit(self._scan())
+
+    def connect(self, dev):
+        """Add dev to the pool (other connections stay up)."""
+        return self.submit(self._connect(dev))
+
+    def disconnect(self, dev=None):
+        """Disconnect dev, or every controller if dev is None."""
+        return self.submit(self._disconnect(dev))
+
+    def quick_start(self):
+        """Connect to the last used device (if any) and scan at the same time."""
+        last = self.cache.last_device() if self.cache else None
+        if last:
+            self.connect(last)
+        return self.scan()
+
+    def shutdown(self, timeout=3.0):
+        """Disconnect everything and stop the service loop."""
+        if not self.loop.is_running():
+            return
+        try:
+            self.disconnect().result(timeout)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+    # ── coroutines (run on the service loop only) ────────────────────────────
+    async def _scan(self):
+        if not self._links:
+            self._set(status_text="Scanning...")
+        try:
+            found = await self.transport.discover()
+            if self.cache:
+                self.cache.seen(found)
+            # Devices seen now first, then known ones that were not in range
+            addresses = {d["address"] for d in found}
+            known = [d for d in (self.cache.devices() if self.cache else []) if d["address"] not in addresses]
+            devices = found + known
+            self._set(devices=devices)
+            if not self._links:
+                self._set(status_text=f"Found {len(found)} devices")
+            if self.on_devices:
+                self.on_devices(devices)
+        except Exception as e:
+            self._set(status_text=f"Scan error: {e}")
+
+    async def _connect(self, dev):
+        address = dev["address"]
+        if address in self._links:
+            return True
+        if len(self._links) >= self.max_connections:
+            self._set(status_text=f"At most {self.max_connections} controllers")
+            return False
+        self._wanted[address] = dev
+        return await self._open(dev)
+
+    async def _open(self, dev):
+        address = dev["address"]
+        self._set(status_text=f"Connecting to {dev['name']}...")
+        try:
+            client = self.transport.client(address, self._handle_link_lost)
+            await client.connect()
+            if not client.is_connected:
+                self._set(status_text="Conn error: not connected")
+                return False
+            if self._wanted.get(address) is not dev:
+                # The user moved on while we were connecting
+                await client.disconnect()
+                return False
+            with self._lock:
+                self._links[address] = (dev, client)
+            self._set(status_text=self._connected_status())
+            await client.start_notify(self.notify_uuid,
+                                      lambda sender, data: self.notification_handler(address, data))
+            if self.cache:
+                self.cache.connected(dev)
+            if self.on_connected:
+                self.on_connected(dev)
+            return True
+        except Exception as e:
+            with self._lock:
+                self._links.pop(address, None)
+            self._set(status_text=f"Conn error: {e}")
+            return False
+
+    async def _disconnect(self, dev=None):
+        if dev is not None:
+            addresses = [dev["address"]]
+        else:
+            addresses = list(dict.fromkeys(list(self._links) + list(self._wanted)))
+        if not any(a in self._links for a in addresses):
+            for address in addresses:
+                self._wanted.pop(address, None)
+            self._set(status_text="No device" if not self._links else self._connected_status())
+            return
+        for address in addresses:
+            self._wanted.pop(address, None)
+            # Drop the link first so the disconnected callback sees a user disconnect
+            with self._lock:
+                link = self._links.pop(address, None)
+            if link is None:
+                continue
+            try:
+                await link[1].disconnect()
+            except Exception:
+                pass
+            if self.on_disconnected:
+                self.on_disconnected(link[0])
+        self._set(status_text=self._connected_status())
+
+    async def _reconnect(self, dev):
+        address = dev["address"]
+        delay, max_delay = self.reconnect_delays
+        while self._wanted.get(address) is dev and address not in self._links:
+            self._set(status_text=f"{dev['name']} lost, retrying in {delay:.1f}s...")
+            await asyncio.sleep(delay)
+            if self._wanted.get(address) is not dev or address in self._links:
+                return
+            if await self._open(dev):
+                return
+            delay = min(delay*2, max_delay)
+
+    def _handle_link_lost(self, client):
+        # Called by bleak on the service loop when a peripheral goes away
+        with self._lock:
+            address = next((a for a, (_, c) in self._links.items() if c is client), None)
+            link = self._links.pop(address, None) if address else None
+        if link is None:
+            return
+        self._set(status_text=f"Connection lost: {link[0]['name']}")
+        if self.on_disconnected:
+            self.on_disconnected(link[0])
+        if self.auto_reconnect and address in self._wanted:
+            self.loop.create_task(self._reconnect(self._wanted[address]))
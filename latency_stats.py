@@ -0,0 +1,107 @@
+import json
+import platform
+import sys
+import time
+from collections import deque
+import numpy as np
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Pipeline stages timed by the simulator (all values in milliseconds)
+STAGES = (
+    ('notify_to_consume',  'BLE notify -> update'),
+    ('consume_to_physics', 'update -> physics done'),
+    ('physics_to_present', 'physics -> frame drawn'),
+    ('input_to_photon',    'input -> frame drawn'),
+    ('frame_time',         'frame time'),
+)
+
+# Fixed session histogram bins: log-spaced from 0.01 ms to 100 s, so session
+# percentiles are exact to within one bin (about 6%) at constant memory
+HIST_EDGES_MS = np.logspace(-2, 5, 281)
+
+class LatencyMonitor:
+    """Rolling latency percentiles per stage plus a bounded session record.
+
+    The rolling windows (last `window` samples) feed the on-figure overlay.
+    The whole session is kept as a fixed-bin histogram with count, sum and
+    max per stage, so memory stays constant however long the session and
+    however fast the controller; `dump()` writes it for offline comparison
+    of sessions recorded on different machines.
+    """
+
+    def __init__(self, window=600):
+        self.window = window
+        self.started = time.time()
+        self.recent = {name: deque(maxlen=window) for name, _ in STAGES}
+        self.session = {name: {'counts': np.zeros(len(HIST_EDGES_MS)+1, dtype=np.int64),
+                               'sum': 0.0, 'max': 0.0} for name, _ in STAGES}
+
+    def record(self, stage, seconds):
+        """Add one duration (or an array of durations) in seconds to stage."""
+        ms = np.atleast_1d(np.asarray(seconds, dtype=float)) * 1000.0
+        if not len(ms):
+            return
+        self.recent[stage].extend(ms)
+        # Bin 0 is below the first edge, the last bin above the last one
+        s = self.session[stage]
+        s['counts'] += np.bincount(np.searchsorted(HIST_EDGES_MS, ms, side='right'),
+                                   minlength=len(s['counts']))
+        s['sum'] += float(ms.sum())
+        s['max'] = max(s['max'], float(ms.max()))
+
+    def summary(self, recent=True):
+        """Per-stage stats over the rolling window, or over the whole session
+        (percentiles then report the upper edge of their histogram bin)."""
+        stats = {}
+        for name, _ in STAGES:
+            if recent:
+                values = np.asarray(self.recent[name])
+                if not len(values):
+                    continue
+                p50, p95, p99 = np.percentile(values, [50, 95, 99])
+                count, mean, peak = len(values), values.mean(), values.max()
+            else:
+                s = self.session[name]
+                count = int(s['counts'].sum())
+                if not count:
+                    continue
+                cdf = np.cumsum(s['counts'])
+                upper = np.append(HIST_EDGES_MS, s['max'])
+                p50, p95, p99 = (min(upper[np.searchsorted(cdf, np.ceil(q*count))], s['max'])
+                                 for q in (0.50, 0.95, 0.99))
+                mean, peak = s['sum']/count, s['max']
+            stats[name] = {'count': int(count), 'mean': float(mean),
+                           'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+                           'max': float(peak)}
+        return stats
+
+    def overlay_text(self):
+        stats = self.summary()
+        lines = [f"{'stage':<24}{'p50':>7}{'p95':>7}{'p99':>7}  ms"]
+        for name, label in STAGES:
+            if name in stats:
+                s = stats[name]
+                lines.append(f"{label:<24}{s['p50']:7.1f}{s['p95']:7.1f}{s['p99']:7.1f}")
+            else:
+                lines.append(f"{label:<24}{'--':>7}{'--':>7}{'--':>7}")
+        if 'frame_time' in stats:
+            lines.append(f"FPS (median): {1000.0 / max(stats['frame_time']['p50'], 1e-6):.1f}")
+        return "\n".join(lines)
+
+    def dump(self, path, extra=None):
+        """Write the session summary, histograms and the recent window as JSON."""
+        report = {
+            'started': self.started,
+            'duration_s': time.time() - self.started,
+            'machine': {'platform': platform.platform(), 'processor': platform.processor(),
+                        'python': sys.version.split()[0]},
+            'summary': self.summary(recent=False),
+            'histogram_edges_ms': HIST_EDGES_MS.tolist(),
+            'histograms': {name: self.session[name]['counts'].tolist() for name, _ in STAGES},
+            'recent_samples_ms': {name: list(self.recent[name]) for name, _ in STAGES},
+        }
+        if extra:
+            report.update(extra)
+        with open(path, 'w') as f:
+            json.dump(report, f)
+        return path
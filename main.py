@@ -1,17 +1,45 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import numpy as np
-import matplotlib
-from matplotlib import font_manager
 import glob
 import os
+import threading
+import zipfile
 
-# Set font configuration
-plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans', 'Liberation Sans']
-plt.rcParams['axes.unicode_minus'] = False
+# Export configuration: file extension -> format name, and rows written per chunk
+EXPORT_FORMATS = {
+    '.csv': 'CSV',
+    '.parquet': 'Parquet',
+    '.feather': 'Feather',
+    '.npz': 'NPZ',
+}
+EXPORT_CHUNK_ROWS = 100000
+
+# pandas, numpy and matplotlib are imported by load_heavy_modules() after the
+# directory dialog, so the first window does not wait for them.  preload_heavy_modules()
+# starts importing them in the background while the dialog is open.
+pd = np = plt = FigureCanvasTkAgg = None
+
+def preload_heavy_modules():
+    def worker():
+        try:
+            import numpy, pandas, matplotlib.font_manager  # builds the font cache on first run
+        except ImportError:
+            pass
+    threading.Thread(target=worker, name="preload", daemon=True).start()
+
+def load_heavy_modules():
+    """Import pandas, numpy and matplotlib (TkAgg) and set the fonts."""
+    global pd, np, plt, FigureCanvasTkAgg
+    if plt is not None:
+        return
+    import numpy as np
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+    # Set font configuration
+    plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans', 'Liberation Sans']
+    plt.rcParams['axes.unicode_minus'] = False
 
 class ToolTip:
     """Create a tooltip for a given widget"""
@@ -76,7 +104,7 @@ class DataPlotter:
         y = (progress_window.winfo_screenheight() // 2) - (100 // 2)
         progress_window.geometry(f"300x100+{x}+{y}")
         
-        progress_label = ttk.Label(progress_window, text="Combining CSV files...", font=("Arial", 10))
+        progress_label = ttk.Label(progress_window, text="Loading libraries...", font=("Arial", 10))
         progress_label.pack(pady=30)
         
         # Update the window
@@ -84,6 +112,9 @@ class DataPlotter:
         
         # First, combine CSV files
         try:
+            load_heavy_modules()
+            progress_label.config(text="Combining CSV files...")
+            progress_window.update()
             self.combine_csv_files()
             progress_label.config(text="Loading data...")
             progress_window.update()
@@ -214,6 +245,7 @@ class DataPlotter:
         file_menu.add_command(label="Select Log Directory", command=self.change_log_directory)
         file_menu.add_separator()
         file_menu.add_command(label="Refresh Data", command=self.refresh_data)
+        file_menu.add_command(label="Export Data...", command=self.start_export)
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.root.quit)
         
@@ -294,6 +326,10 @@ class DataPlotter:
         deselect_all_btn = ttk.Button(button_frame, text="Deselect All", command=self.deselect_all)
         deselect_all_btn.pack(pady=2, fill=tk.X)
         
+        export_btn = ttk.Button(button_frame, text="Export Visible Range...", command=self.start_export)
+        export_btn.pack(pady=2, fill=tk.X)
+        self.create_tooltip(export_btn, "Export selected attributes in the current time range\n(CSV, Parquet, Feather or NPZ)")
+        
         # Add data information
         info_frame = ttk.LabelFrame(control_frame, text="Data Information", padding=5)
         info_frame.pack(pady=10, fill=tk.X)
@@ -531,15 +567,171 @@ Features:
 • Interactive plot with zoom/pan
 • Attribute selection with checkboxes
 • Data refresh capability
-• Export functionality
+• Export of selected attributes in the visible time range
+  (CSV, Parquet, Feather, NPZ)
 
 Created for data analysis and visualization."""
         
         messagebox.showinfo("About", about_text)
+    
+    def export_rows(self, df, x_range=None):
+        """Return the row indices of df whose time lies inside x_range"""
+        if x_range is None:
+            return np.arange(len(df))
+        lo, hi = min(x_range), max(x_range)
+        time_values = df['time'].to_numpy()
+        return np.flatnonzero((time_values >= lo) & (time_values <= hi))
+    
+    def export_data(self, path, columns=None, x_range=None, progress_callback=None):
+        """Export columns of the rows inside x_range to path.
+        
+        The format is chosen from the file extension (see EXPORT_FORMATS).
+        Rows are written in chunks of EXPORT_CHUNK_ROWS straight from the
+        loaded data, so only one chunk is copied in memory at a time.
+        progress_callback, if given, is called with a fraction in [0, 1].
+        Returns the number of exported rows.
+        """
+        df = self.df
+        if columns is None:
+            columns = [col for col, var in self.checkbox_vars.items() if var.get()]
+        columns = ['time'] + [col for col in columns if col != 'time']
+        
+        ext = os.path.splitext(path)[1].lower()
+        if ext not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {ext or '(none)'}\n"
+                             f"Supported: {', '.join(EXPORT_FORMATS)}")
+        
+        rows = self.export_rows(df, x_range)
+        total = len(rows)
+        report = progress_callback or (lambda fraction: None)
+        
+        # Select rows and columns together so a chunk never copies unexported columns
+        column_idx = df.columns.get_indexer(columns)
+        
+        def chunks():
+            for start in range(0, total, EXPORT_CHUNK_ROWS):
+                yield start, df.iloc[rows[start:start + EXPORT_CHUNK_ROWS], column_idx]
+        
+        if ext == '.csv':
+            with open(path, 'w', newline='') as f:
+                if total == 0:
+                    f.write(','.join(columns) + '\n')
+                for start, chunk in chunks():
+                    chunk.to_csv(f, header=(start == 0), index=False)
+                    report((start + len(chunk)) / total)
+        elif ext in ('.parquet', '.feather'):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError(f"{EXPORT_FORMATS[ext]} export requires pyarrow (pip install pyarrow)")
+            # Schema from an empty slice; object columns (pandas strings) have no
+            # type there, so they are declared as strings
+            empty = df.iloc[:0, column_idx]
+            schema = pa.Schema.from_pandas(empty, preserve_index=False)
+            for col in columns:
+                if empty[col].dtype == object:
+                    schema = schema.set(schema.get_field_index(col), pa.field(col, pa.string()))
+            if ext == '.parquet':
+                writer = pq.ParquetWriter(path, schema)
+            else:
+                # Feather v2 is the Arrow IPC file format
+                writer = pa.ipc.new_file(path, schema)
+            with writer:
+                for start, chunk in chunks():
+                    writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                    report((start + len(chunk)) / total)
+        else:
+            # One .npy member per column, written chunk by chunk after the header
+            with zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True) as zf:
+                for i, col in enumerate(columns):
+                    values = df[col].to_numpy()
+                    if values.dtype.hasobject:
+                        # Fixed-width strings: find the width in a first pass, then convert per chunk
+                        width = max([np.char.str_len(values[rows[start:start + EXPORT_CHUNK_ROWS]].astype(str)).max(initial=1)
+                                     for start in range(0, total, EXPORT_CHUNK_ROWS)], default=1)
+                        dtype = np.dtype(f'<U{width}')
+                    else:
+                        dtype = values.dtype
+                    with zf.open(f"{col}.npy", 'w', force_zip64=True) as member:
+                        header = np.lib.format.header_data_from_array_1_0(np.empty(0, dtype))
+                        header['shape'] = (total,)
+                        np.lib.format.write_array_header_2_0(member, header)
+                        for start in range(0, total, EXPORT_CHUNK_ROWS):
+                            member.write(values[rows[start:start + EXPORT_CHUNK_ROWS]].astype(dtype, copy=False).tobytes())
+                    report((i + 1) / len(columns))
+        
+        report(1.0)
+        return total
+    
+    def start_export(self):
+        """Ask for a target file and export the visible range in the background"""
+        columns = [col for col, var in self.checkbox_vars.items() if var.get()]
+        if not columns:
+            messagebox.showwarning("Warning", "Please select at least one attribute to export.")
+            return
+        x_range = self.ax.get_xlim()
+        
+        path = filedialog.asksaveasfilename(
+            title="Export Data",
+            defaultextension=".csv",
+            initialfile="export.csv",
+            filetypes=[(f"{name} files", f"*{ext}") for ext, name in EXPORT_FORMATS.items()]
+        )
+        if not path:
+            return
+        
+        # Show progress window
+        progress = tk.Toplevel(self.root)
+        progress.title("Exporting...")
+        progress.geometry("300x100")
+        progress.resizable(False, False)
+        progress.transient(self.root)
+        
+        # Center the dialog
+        progress.update_idletasks()
+        x = (progress.winfo_screenwidth() // 2) - (300 // 2)
+        y = (progress.winfo_screenheight() // 2) - (100 // 2)
+        progress.geometry(f"300x100+{x}+{y}")
+        
+        label = ttk.Label(progress, text=f"Exporting to {os.path.basename(path)}...", font=("Arial", 10))
+        label.pack(pady=(15, 5))
+        bar = ttk.Progressbar(progress, length=250, mode='determinate', maximum=1.0)
+        bar.pack(pady=5)
+        
+        # The worker thread only writes to this dict; Tk is updated from the main loop
+        status = {'progress': 0.0, 'done': False, 'rows': 0, 'error': None}
+        
+        def worker():
+            try:
+                status['rows'] = self.export_data(
+                    path, columns, x_range,
+                    progress_callback=lambda fraction: status.__setitem__('progress', fraction))
+            except Exception as e:
+                status['error'] = e
+            finally:
+                status['done'] = True
+        
+        def poll():
+            bar['value'] = status['progress']
+            if not status['done']:
+                self.root.after(100, poll)
+                return
+            progress.destroy()
+            if status['error'] is not None:
+                messagebox.showerror("Error", f"Error exporting data: {str(status['error'])}")
+            else:
+                messagebox.showinfo("Success", f"Exported {status['rows']} rows x {len(columns) + 1} columns\n"
+                                               f"Time range: {min(x_range):.2f} - {max(x_range):.2f}\n"
+                                               f"File: {path}")
+        
+        threading.Thread(target=worker, daemon=True).start()
+        poll()
 
 def main():
     try:
         root = tk.Tk()
+        preload_heavy_modules()
         
         # Set window icon (if available)
         try:
@@ -1,48 +1,77 @@
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.animation import FuncAnimation
-from mpl_toolkits.mplot3d import Axes3D
+from mpl_toolkits.mplot3d.art3d import Line3DCollection
 import matplotlib.gridspec as gridspec
 import asyncio
-import threading
 import time
+import os
 import sys
 import signal
-from bleak import BleakClient, BleakScanner
+import queue
 from matplotlib.widgets import Button, CheckButtons
+from ble_service import BLEService, DeviceCache, SampleRing, parse_controller_packet
+from latency_stats import LatencyMonitor
+from sim_engine import (DEFAULT_PARAMS, START, motors, MOTOR_XY, MOTOR_SPIN,
+                        rotor_speed_factors, clip_knobs, place_targets, TargetGrid, Fleet)
+from telemetry_recorder import (TelemetryRecorder, EVENT_NONE, EVENT_GAME_START,
+                                EVENT_TARGET_COLLECTED, EVENT_GAME_COMPLETE)
 
 # ─────────────────────────────────────────────────────────────────────────────
-# Simulation & control parameters
-dt = 0.1
-L = 2.0
-drone_body_radius = 1.5
-rotor_radius = 1.2
-base_speed = 10
-yaw_adjust_factor = 0.2
-k_p, k_r = 0.3, 0.3
-z_pitch, z_roll = 0.5, 0.5
+# Simulation & control parameters (defaults and physics live in sim_engine.py)
+params = dict(DEFAULT_PARAMS)
+physics_hz = params['physics_hz']
+max_physics_steps = 10  # per rendered frame; older backlog is dropped
+L = params['L']
+drone_body_radius = params['drone_body_radius']
+rotor_radius = params['rotor_radius']
+z_pitch, z_roll = params['z_pitch'], params['z_roll']
 
 # ─────────────────────────────────────────────────────────────────────────────
 # State holders
-state = {'x': 0.0, 'y': 0.0, 'z': 2.5, 'yaw': 0.0}
-rotor_angle = 0.0
+# Every drone lives in one Fleet (structure of arrays).  Slot 0 is the main
+# drone, flown with the on-screen knobs or the first controller; each extra
+# controller gets its own slot and drone.
+max_drones = 4
+fleet = Fleet(max_drones, params)
+physics_accumulator = 0.0
+last_frame_time = None
 
 # Game
-targets = []
+targets = TargetGrid(np.zeros((0,3)), drone_body_radius)  # current game's targets
+targets_changed = True
 coord_texts = []
 game_start_time = None
-best_time = None
+best_times = {False: None, True: None}  # per mode: normal / swarm
 difficult_mode = False
+swarm_mode = False
+game_mode = False  # swarm_mode of the current game, fixed when it is created
+swarm_target_count = 1000
 
 # Bluetooth
 NOTIFY_UUID = "00002a6e-0000-1000-8000-00805f9b34fb"
-bt_devices = []
-bt_client = None
-is_connected = False
-bt_data_lock = threading.Lock()
-bt_knob1_x = bt_knob1_y = bt_knob2_x = bt_knob2_y = 0.0
+# DRONE_BLE_TRANSPORT=fake uses an in-process simulated controller (ble_fake.py);
+# DRONE_FAKE_RATE sets its notification rate in Hz
+bt_transport_name = os.environ.get("DRONE_BLE_TRANSPORT", "bleak")
+# Known controllers; the last one used is reconnected at startup
+bt_cache_path = os.path.join(os.path.expanduser("~"), ".pydrone", f"known_devices_{bt_transport_name}.json")
+bt_service = None  # BLEService, started once the figure exists
+bt_rings = {}                 # address -> SampleRing, filled by notification_handler
+bt_events = queue.SimpleQueue()  # (kind, device or device list) from the BLE thread, handled in update
+bt_slots = {}                 # address -> fleet slot of each connected controller
+bt_knobs = np.zeros((max_drones,4))  # last applied sample per slot: knob2 x/y, knob1 x/y
+BT_TO_INPUTS = [2,3,0,1]      # packet order -> Fleet.inputs order
 bt_mode = "Manual"
-bt_status_text = "Bluetooth: Not connected"
+
+# Telemetry recording (logs/log_<ts>.csv, readable by main.py)
+recorder = None
+telemetry_event = EVENT_NONE  # attached to the next recorded physics step
+
+# Latency instrumentation ('t' toggles the overlay, 'd' dumps the session)
+latency = LatencyMonitor()
+frame_marks = {'physics': None, 'input': None, 'presented': None}
+latency_overlay_period = 0.5  # seconds between overlay refreshes
+latency_overlay_updated = 0.0
 
 # 自动退出程序的标志
 program_start_time = time.time()
@@ -52,14 +81,11 @@ auto_exit_delay = 5  # 5秒后自动退出
 # ─────────────────────────────────────────────────────────────────────────────
 # Cleanup on exit
 def cleanup_resources():
-    global bt_client, is_connected
-    is_connected = False
-    if bt_client:
+    if recorder:
+        recorder.stop()
+    if bt_service:
         try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(bt_client.disconnect())
-            loop.close()
+            bt_service.shutdown()
         except:
             pass
 
@@ -80,15 +106,22 @@ class Knob:
         ax.add_patch(circle)
         self.indicator, = ax.plot([0],[0],'ro',markersize=8)
         self.active = False
+        self.dirty = False
 
     def update(self, x, y):
+        # Only stores the latest position; the indicator is moved by flush()
+        # as part of the next animation frame, so mouse motion never redraws.
         if x is None or y is None: return
         r = np.hypot(x,y)
         if r>self.radius:
             x,y = x*self.radius/r, y*self.radius/r
         self.value = np.array([x,y])
-        self.indicator.set_data([x],[y])
-        self.ax.figure.canvas.draw()
+        self.dirty = True
+
+    def flush(self):
+        if self.dirty:
+            self.indicator.set_data([self.value[0]],[self.value[1]])
+            self.dirty = False
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Dropdown & toolbar for Bluetooth
@@ -143,101 +176,89 @@ class ToolbarButton:
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Bluetooth functions (from code2)
-async def scan_bluetooth_devices():
-    global bt_devices, bt_status_text
-    bt_status_text = "Scanning..."
-    try:
-        devices = await BleakScanner.discover()
-        bt_devices.clear()
-        for d in devices:
-            if d.name:
-                bt_devices.append({"name":d.name,"address":d.address})
-        bt_status_text = f"Found {len(bt_devices)} devices"
-        dropdown.set_items([d["name"] for d in bt_devices])
-    except Exception as e:
-        bt_status_text = f"Scan error: {e}"
-
-def thread_scan_devices():
-    asyncio.run(scan_bluetooth_devices())
+# All BLE work runs on bt_service's event loop; these callbacks run on its thread.
+def on_bt_devices(devices):
+    bt_events.put(("devices", devices))
+
+def on_bt_connected(dev):
+    bt_events.put(("connected", dev))
+
+def on_bt_disconnected(dev):
+    bt_events.put(("disconnected", dev))
+
+def slot_start(slot):
+    """Spawn point of a slot's drone: side by side along x."""
+    return (START[0]+3.0*slot, START[1], START[2])
+
+def handle_bt_events():
+    """Apply device lists and assign fleet slots to controllers as they
+    come and go (GUI thread)."""
+    global bt_mode
+    while True:
+        try:
+            kind, dev = bt_events.get_nowait()
+        except queue.Empty:
+            break
+        if kind=="devices":
+            dropdown.set_items([d["name"] for d in dev])
+            continue
+        address = dev["address"]
+        if kind=="connected" and address not in bt_slots:
+            free = [s for s in range(max_drones) if s not in bt_slots.values()]
+            if not free:
+                continue
+            slot = bt_slots[address] = free[0]
+            bt_knobs[slot] = 0.0
+            if slot==0:
+                bt_mode = "Bluetooth"
+            else:
+                fleet.spawn(slot, *slot_start(slot))
+        elif kind=="disconnected" and address in bt_slots:
+            slot = bt_slots.pop(address)
+            bt_knobs[slot] = 0.0
+            if slot==0:
+                bt_mode = "Manual"
+                knob1.update(0,0); knob2.update(0,0)
+            else:
+                fleet.remove(slot)
+        mode_button.button.label.set_text(f"Mode: {bt_mode}")
 
 def connect_callback(event):
     if not dropdown.selected_item:
         print("Please select a device first")
         return
-    for dev in bt_devices:
+    for dev in bt_service.devices:
         if dev["name"]==dropdown.selected_item:
-            threading.Thread(target=thread_connect_device, args=(dev,), daemon=True).start()
+            bt_service.connect(dev)
             return
 
-async def connect_to_device(dev):
-    global bt_client, is_connected, bt_status_text, bt_mode
-    bt_status_text="Connecting..."
-    try:
-        client = BleakClient(dev["address"], timeout=10.0)
-        await client.connect()
-        if client.is_connected:
-            bt_client = client
-            is_connected = True
-            bt_status_text = "Connected"
-            await client.start_notify(NOTIFY_UUID, notification_handler)
-            bt_mode = "Bluetooth"
-            mode_button.button.label.set_text(f"Mode: {bt_mode}")
-            plt.draw()
-            while client.is_connected:
-                await asyncio.sleep(0.1)
-    except Exception as e:
-        bt_status_text=f"Conn error: {e}"
-        bt_client=None
-        is_connected=False
-
-def thread_connect_device(dev):
-    asyncio.run(connect_to_device(dev))
-
 def disconnect_callback(event):
-    threading.Thread(target=thread_disconnect_device, daemon=True).start()
+    # The selected controller if it is connected, otherwise all of them
+    for dev in bt_service.connected_devices:
+        if dev["name"]==dropdown.selected_item:
+            bt_service.disconnect(dev)
+            return
+    bt_service.disconnect()
 
-async def disconnect_device():
-    global bt_client, is_connected, bt_status_text, bt_mode
-    if not bt_client:
-        bt_status_text="No device"
+def notification_handler(address, data):
+    samples = parse_controller_packet(data)
+    if samples is None:
         return
-    is_connected=False
-    bt_mode="Manual"
-    mode_button.button.label.set_text(f"Mode: {bt_mode}")
-    plt.draw()
-    try: await bt_client.disconnect()
-    except: pass
-    bt_client=None
-    bt_status_text="Disconnected"
-    with bt_data_lock:
-        global bt_knob1_x, bt_knob1_y, bt_knob2_x, bt_knob2_y
-        bt_knob1_x=bt_knob1_y=bt_knob2_x=bt_knob2_y=0.0
-
-def thread_disconnect_device():
-    asyncio.run(disconnect_device())
-
-def notification_handler(sender, data):
-    global bt_knob1_x, bt_knob1_y, bt_knob2_x, bt_knob2_y
-    try:
-        text = data.decode('utf-8').strip()
-        if text.startswith('[') and text.endswith(']'):
-            parts = [p.strip() for p in text[1:-1].split(',')]
-            vals = [float(p) for p in parts if p]
-            while len(vals)<4: vals.append(0.0)
-            with bt_data_lock:
-                bt_knob2_x, bt_knob2_y = vals[0]/100, vals[1]/100
-                bt_knob1_x, bt_knob1_y = vals[2]/100, vals[3]/100
-    except:
-        pass
+    # Keep each stick inside the unit circle, as Knob does for manual input
+    samples = clip_knobs(samples)
+    ring = bt_rings.get(address)
+    if ring is None:
+        ring = bt_rings[address] = SampleRing()
+    ring.push(time.perf_counter(), samples)
 
 def toggle_mode_callback(event):
-    global bt_mode, bt_status_text
-    if bt_mode=="Manual" and is_connected:
+    global bt_mode
+    if bt_mode=="Manual" and 0 in bt_slots.values():
         bt_mode="Bluetooth"
-        bt_status_text="Bluetooth mode"
+        bt_service.status_text="Bluetooth mode"
     else:
         bt_mode="Manual"
-        bt_status_text="Manual mode"
+        bt_service.status_text="Manual mode"
         knob1.update(0,0); knob2.update(0,0)
     mode_button.button.label.set_text(f"Mode: {bt_mode}")
     plt.draw()
@@ -281,134 +302,282 @@ fig.canvas.mpl_connect('button_release_event',
 # Create Game UI
 btn_game_ax   = fig.add_axes([0.82,0.40,0.12,0.05])
 btn_game      = Button(btn_game_ax,   'Create Game')
-check_ax      = fig.add_axes([0.82,0.33,0.12,0.05])
-check_game    = CheckButtons(check_ax, ['Difficult'], [False])
+check_ax      = fig.add_axes([0.82,0.30,0.12,0.08])
+check_game    = CheckButtons(check_ax, ['Difficult','Swarm'], [False,False])
 #check_game.on_clicked(lambda label: setattr(globals(), 'difficult_mode', not difficult_mode))
 def on_toggle(label):
-    global difficult_mode
-    difficult_mode = not difficult_mode
+    global difficult_mode, swarm_mode
+    if label=='Swarm':
+        swarm_mode = not swarm_mode
+    else:
+        difficult_mode = not difficult_mode
 
 check_game.on_clicked(on_toggle)
 
 def create_game(event):
-    global game_start_time, targets, coord_texts, state
+    global game_start_time, targets, targets_changed, coord_texts, telemetry_event, game_mode
+    game_mode = swarm_mode
     for txt in coord_texts: txt.remove()
-    coord_texts.clear(); targets.clear()
-    state.update(x=0.0,y=0.0,z=2.5)
-    state['yaw'] = np.random.uniform(np.pi/2,3*np.pi/2) if difficult_mode else 0.0
-    xlim,ylim,zlim = ax3d.get_xlim(), ax3d.get_ylim(), ax3d.get_zlim()
-    for i in range(3):
-        while True:
-            tx = np.random.uniform(xlim[0]+1,xlim[1]-1)
-            ty = np.random.uniform(ylim[0]+1,ylim[1]-1)
-            tz = np.random.uniform(1,5)
-            if np.linalg.norm([tx-state['x'],ty-state['y'],tz-state['z']])>drone_body_radius:
-                break
-        targets.append((tx,ty,tz))
-        coord_texts.append(fig.text(0.02,0.80 - i*0.03,
-                                    f'T{i+1}: ({tx:.1f},{ty:.1f},{tz:.1f})'))
+    coord_texts.clear()
+    for slot in fleet.slots:
+        yaw = np.random.uniform(np.pi/2,3*np.pi/2) if difficult_mode else 0.0
+        fleet.spawn(slot, *slot_start(slot), yaw=yaw)
+    count = swarm_target_count if game_mode else 3
+    pts = place_targets(np.random, count, drone_body_radius,
+                        xlim=ax3d.get_xlim(), ylim=ax3d.get_ylim(),
+                        avoid=[slot_start(slot) for slot in fleet.slots])
+    targets = TargetGrid(pts, drone_body_radius)
+    targets_changed = True
+    if game_mode:
+        coord_texts.append(fig.text(0.02,0.80,f'Targets left: {count}'))
+    else:
+        for i,(tx,ty,tz) in enumerate(pts):
+            coord_texts.append(fig.text(0.02,0.80 - i*0.03,
+                                        f'T{i+1}: ({tx:.1f},{ty:.1f},{tz:.1f})'))
+    target_markers.set_sizes([25 if game_mode else 100])
+    target_shadows.set_sizes([15 if game_mode else 50])
+    best_text.set_text(f'Best: {best_times[game_mode]:.2f}s' if best_times[game_mode] else 'Best: --')
     game_start_time = time.time()
     elapsed_text.set_text('Time: 0.00s')
+    telemetry_event = EVENT_GAME_START
 
 btn_game.on_clicked(create_game)
 
+btn_record_ax = fig.add_axes([0.82,0.47,0.12,0.05])
+btn_record    = Button(btn_record_ax, 'Record: Off')
+
+def toggle_recording(event):
+    global recorder
+    if recorder:
+        recorder.stop()
+        print(f"Telemetry: {recorder.rows_written} rows in {len(recorder.files)} file(s): {', '.join(recorder.files)}")
+        recorder = None
+        btn_record.label.set_text('Record: Off')
+    else:
+        recorder = TelemetryRecorder().start()
+        btn_record.label.set_text('Record: On')
+
+btn_record.on_clicked(toggle_recording)
+
 # Bluetooth panel
 ax_bt = fig.add_axes(plt.subplot2grid((10,1),(9,0),rowspan=1))
 ax_bt.axis('off')
 dropdown         = Dropdown(ax_bt)
-refresh_button   = ToolbarButton(ax_bt, "Refresh",   lambda e: threading.Thread(target=thread_scan_devices,daemon=True).start(), x=0.05, y=0.05)
+refresh_button   = ToolbarButton(ax_bt, "Refresh",   lambda e: bt_service.scan(), x=0.05, y=0.05)
 connect_button   = ToolbarButton(ax_bt, "Connect",   connect_callback, x=0.17, y=0.05)
 disconnect_button= ToolbarButton(ax_bt, "Disconnect", disconnect_callback, x=0.29, y=0.05)
 mode_button      = ToolbarButton(ax_bt, f"Mode: {bt_mode}", toggle_mode_callback, x=0.83, y=0.05)
 
-bt_status = ax_bt.text(0.5,0.15,bt_status_text,ha='center',transform=ax_bt.transAxes)
+bt_status = ax_bt.text(0.5,0.15,"Bluetooth: Not connected",ha='center',transform=ax_bt.transAxes)
 
 # Drawing & animation
-def circle_points(center, radius, n=50):
-    θ = np.linspace(0,2*np.pi,n)
-    return (center[0]+radius*np.cos(θ),
-            center[1]+radius*np.sin(θ),
-            np.full_like(θ,center[2]))
-
-def draw_scene():
-    xlim,ylim,zlim = ax3d.get_xlim(),ax3d.get_ylim(),ax3d.get_zlim()
-    elev,azim = ax3d.elev,ax3d.azim
-    ax3d.cla()
-    ax3d.set_xlim(xlim); ax3d.set_ylim(ylim); ax3d.set_zlim(zlim)
-    ax3d.view_init(elev=elev,azim=azim)
-    for tx,ty,tz in targets:
-        ax3d.scatter(tx,ty,0, c='gray',marker='o',s=50,alpha=0.3)
-        ax3d.scatter(tx,ty,tz,c='magenta',marker='X',s=100)
-    x,y,z,yaw = state['x'],state['y'],state['z'],state['yaw']
-    ax3d.scatter(x,y,0,c='gray',marker='o',s=150,alpha=0.3)
-    ax3d.scatter(x,y,z,c='k',marker='o',s=100)
-    fx,fy = x-0.5*np.sin(yaw), y+0.5*np.cos(yaw)
-    ax3d.scatter(fx,fy,z,c='yellow',marker='o',s=150)
-    motors = [(( L/np.sqrt(2),  L/np.sqrt(2)),'A',1),
-              (( L/np.sqrt(2), -L/np.sqrt(2)),'B',-1),
-              ((-L/np.sqrt(2), -L/np.sqrt(2)),'A',1),
-              ((-L/np.sqrt(2),  L/np.sqrt(2)),'B',-1)]
-    R = np.array([[np.cos(yaw),-np.sin(yaw)],[np.sin(yaw),np.cos(yaw)]])
-    for (lx,ly),prop,spin in motors:
-        gp = R.dot([lx,ly]) + np.array([x,y])
-        mx,my = gp; rel=gp-np.array([x,y])
-        fwd = rel.dot([-np.sin(yaw),np.cos(yaw)])/L
-        rt  = rel.dot([ np.cos(yaw),np.sin(yaw)])/L
-        sf_yaw = (1-2*knob1.value[0]*yaw_adjust_factor) if prop=='A' else (1+2*knob1.value[0]*yaw_adjust_factor)
-        tilt   = 1-2*k_p*knob2.value[1]*fwd-2*k_r*knob2.value[0]*rt
-        sf     = sf_yaw*tilt
-        mz     = z - z_pitch*knob2.value[1]*fwd - z_roll*knob2.value[0]*rt
-        ax3d.plot([x,mx],[y,my],[z,mz],c='b')
-        cx,cy,cz = circle_points((mx,my,mz),rotor_radius)
-        ax3d.plot(cx,cy,cz,c='k')
-        ang = -spin*rotor_angle*sf
-        ll = rotor_radius
-        x1,y1 = mx-ll*np.cos(ang), my-ll*np.sin(ang)
-        x2,y2 = mx+ll*np.cos(ang), my+ll*np.sin(ang)
-        ax3d.plot([x1,x2],[y1,y2],[mz,mz],c=('red' if prop=='A' else 'green'),lw=3)
+_θ = np.linspace(0,2*np.pi,50)
+UNIT_CIRCLE = np.stack([np.cos(_θ),np.sin(_θ)])                         # (2,50)
+
+def rotor_geometry(x, y, z, yaw, k1x, k2x, k2y, rotor_angle):
+    """Arm ends, rotor rings and blades for every motor of every drone.
+
+    Arguments are scalars or arrays of shape (D,).  Returns
+    motor (D,4,3), rings (D,4,3,n) and blades (D,4,3,2).
+    """
+    x,y,z,yaw,k1x,k2x,k2y,rotor_angle = (np.reshape(v,(-1,1)) for v in np.broadcast_arrays(
+        *(np.asarray(v,dtype=float) for v in (x,y,z,yaw,k1x,k2x,k2y,rotor_angle))))
+    c,s = np.cos(yaw),np.sin(yaw)
+    lx,ly = MOTOR_XY[:,0],MOTOR_XY[:,1]
+    fwd,rt = ly/L, lx/L
+    ang = -MOTOR_SPIN*rotor_angle*rotor_speed_factors(k1x,k2x,k2y,params)  # (D,4)
+
+    motor = np.empty(ang.shape+(3,))
+    motor[...,0] = x + c*lx - s*ly
+    motor[...,1] = y + s*lx + c*ly
+    motor[...,2] = z - z_pitch*k2y*fwd - z_roll*k2x*rt
+
+    rings = np.empty(ang.shape+(3,UNIT_CIRCLE.shape[1]))
+    rings[...,:2,:] = motor[...,:2,None] + rotor_radius*UNIT_CIRCLE
+    rings[...,2,:]  = motor[...,2,None]
+
+    blades = np.empty(ang.shape+(3,2))
+    blade_dir = np.stack([np.cos(ang),np.sin(ang)],axis=-1)             # (D,4,2)
+    blades[...,:2,:] = motor[...,:2,None] + rotor_radius*blade_dir[...,None]*np.array([-1.0,1.0])
+    blades[...,2,:]  = motor[...,2,None]
+    return motor, rings, blades
+
+# Scene artists are created once; draw_scene only moves their geometry, so the
+# axis limits and view angle are never reset.  Each part of every drone shares
+# one collection, so the artist count does not grow with the fleet.
+target_shadows = ax3d.scatter([],[],[],c='gray',marker='o',s=50,alpha=0.3)
+target_markers = ax3d.scatter([],[],[],c='magenta',marker='X',s=100)
+drone_shadow   = ax3d.scatter([0],[0],[0],c='gray',marker='o',s=150,alpha=0.3)
+drone_body     = ax3d.scatter([0],[0],[0],c='k',marker='o',s=100)
+drone_front    = ax3d.scatter([0],[0],[0],c='yellow',marker='o',s=150)
+arm_lines   = ax3d.add_collection(Line3DCollection([],colors='b'),autolim=False)
+rotor_lines = ax3d.add_collection(Line3DCollection([],colors='k'),autolim=False)
+blade_lines = ax3d.add_collection(Line3DCollection([],linewidths=3),autolim=False)
+BLADE_COLORS = ['red' if prop=='A' else 'green' for _,prop,_ in motors]
+drawn_drones = 0
+
+def draw_scene(view, slots):
+    """Draw the drones in slots from view, a (5, max_drones) fleet state."""
+    global targets_changed, drawn_drones
+    if targets_changed:
+        tx,ty,tz = targets.points[targets.alive].T
+        target_shadows._offsets3d = (tx,ty,np.zeros_like(tz))
+        target_markers._offsets3d = (tx,ty,tz)
+        targets_changed = False
+    x,y,z,yaw,angle = view[:,slots]
+    drone_shadow._offsets3d = (x,y,np.zeros_like(z))
+    drone_body._offsets3d   = (x,y,z)
+    drone_front._offsets3d  = (x-0.5*np.sin(yaw),y+0.5*np.cos(yaw),z)
+    k1x,_,k2x,k2y = fleet.inputs[slots].T
+    motor,rings,blades = rotor_geometry(x,y,z,yaw,k1x,k2x,k2y,angle)
+    center = np.broadcast_to(np.stack([x,y,z],axis=-1)[:,None,:],motor.shape)
+    arm_lines.set_segments(np.stack([center,motor],axis=-2).reshape(-1,2,3))
+    rotor_lines.set_segments(rings.swapaxes(-1,-2).reshape(-1,rings.shape[-1],3))
+    blade_lines.set_segments(blades.swapaxes(-1,-2).reshape(-1,2,3))
+    if drawn_drones!=len(slots):
+        blade_lines.set_color(BLADE_COLORS*len(slots))
+        drawn_drones = len(slots)
+
+def collect_targets(slot):
+    global telemetry_event, targets_changed
+    hit = targets.query((fleet.x[slot],fleet.y[slot],fleet.z[slot]),drone_body_radius)
+    if not len(hit):
+        return
+    targets.remove(hit)
+    if game_mode:
+        coord_texts[0].set_text(f'Targets left: {len(targets)}')
+    else:
+        for i in hit: coord_texts[i].set_visible(False)
+    targets_changed = True
+    telemetry_event = EVENT_TARGET_COLLECTED
 
 def update(frame):
-    global rotor_angle, state, game_start_time, best_time
+    global physics_accumulator, last_frame_time
+    global game_start_time, telemetry_event
         
-    # Bluetooth override
-    if bt_mode=="Bluetooth" and is_connected:
-        with bt_data_lock:
-            k1x,k1y = bt_knob1_x,bt_knob1_y
-            k2x,k2y = bt_knob2_x,bt_knob2_y
-        knob1.update(k1x,k1y); knob2.update(k2x,k2y)
-        bt_status.set_text(bt_status_text)
+    # Bluetooth: every sample received from each controller since the last frame
+    handle_bt_events()
+    drained = {address: ring.drain() for address,ring in list(bt_rings.items())}
+    now = time.perf_counter()
+    for samples in drained.values():
+        if len(samples):
+            latency.record('notify_to_consume', now-samples[:,0])
+    use_bt = bt_mode=="Bluetooth" and 0 in bt_slots.values()
+    bt_status.set_text(bt_service.status_text)
     # else manual knobs
     k1x,k1y = knob1.value; k2x,k2y = knob2.value
 
-    # physics
-    rs = base_speed*(1+k1y) if k1y>=0 else base_speed*(1+0.5*k1y)
-    rotor_angle += rs*dt
-    state['z'] += (rs/base_speed-1)*4*dt
-    state['yaw'] += (-k1x*(np.pi/8))*dt
-    dx,dy = 2*k2x*dt,2*k2y*dt
-    state['x'] += np.cos(state['yaw'])*dx - np.sin(state['yaw'])*dy
-    state['y'] += np.sin(state['yaw'])*dx + np.cos(state['yaw'])*dy
-
-    drone_text.set_text(f'Drone: ({state["x"]:.2f},{state["y"]:.2f},{state["z"]:.2f})')
+    # physics: fixed steps driven by wall-clock time, independent of frame rate
+    if last_frame_time is None:
+        last_frame_time = now
+    physics_accumulator += now-last_frame_time
+    last_frame_time = now
+    step_interval = 1.0/physics_hz
+    steps = 0
+    while physics_accumulator>=step_interval and steps<max_physics_steps:
+        # each controller holds its newest sample received before this step's wall time
+        step_end = now-(physics_accumulator-step_interval)
+        for address,slot in bt_slots.items():
+            samples = drained.get(address)
+            if samples is not None and len(samples):
+                i = np.searchsorted(samples[:,0],step_end,side='right')
+                if i:
+                    bt_knobs[slot] = samples[i-1,1:]
+        fleet.inputs[:] = bt_knobs[:,BT_TO_INPUTS]
+        if not use_bt:
+            fleet.inputs[0] = (k1x,k1y,k2x,k2y)
+        slots = fleet.step()
+        if game_start_time is not None:
+            for slot in slots:
+                collect_targets(slot)
+        if recorder:
+            # the log layout holds one drone: the main one
+            recorder.record((round(recorder.elapsed(step_end),4),
+                             *fleet.inputs[0],*fleet.state[:4,0],
+                             fleet.rotor_speed[0],telemetry_event,len(targets)))
+            telemetry_event = EVENT_NONE
+        physics_accumulator -= step_interval
+        steps += 1
+    if steps==max_physics_steps:
+        physics_accumulator = min(physics_accumulator,step_interval)
+    main_samples = next((drained.get(a) for a,s in bt_slots.items() if s==0), None)
+    if use_bt:
+        if main_samples is not None and len(main_samples):
+            bt_knobs[0] = main_samples[-1,1:]
+        knob2.update(*bt_knobs[0,:2]); knob1.update(*bt_knobs[0,2:])
+    frame_marks['physics'] = time.perf_counter()
+    frame_marks['input'] = (main_samples[-1,0] if use_bt and main_samples is not None
+                            and len(main_samples) else None)
+    latency.record('consume_to_physics', frame_marks['physics']-now)
+
+    drones = f' +{len(fleet)-1}' if len(fleet)>1 else ''
+    drone_text.set_text(f'Drone: ({fleet.x[0]:.2f},{fleet.y[0]:.2f},{fleet.z[0]:.2f}){drones}')
 
     # game logic
     if game_start_time is not None:
         elapsed = time.time()-game_start_time
         elapsed_text.set_text(f'Time: {elapsed:.2f}s')
-        to_rm = [i for i,(tx,ty,tz) in enumerate(targets)
-                 if np.linalg.norm([state['x']-tx,state['y']-ty,state['z']-tz])<drone_body_radius]
-        for i in sorted(to_rm,reverse=True):
-            targets.pop(i); coord_texts.pop(i).remove()
         if not targets:
+            best_time = best_times[game_mode]
             if best_time is None or elapsed<best_time:
-                best_time=elapsed; best_text.set_text(f'Best: {best_time:.2f}s')
+                best_times[game_mode]=elapsed; best_text.set_text(f'Best: {elapsed:.2f}s')
             game_start_time=None
+            telemetry_event = EVENT_GAME_COMPLETE
 
-    draw_scene()
+    # render between the last two physics steps
+    draw_scene(fleet.view(physics_accumulator/step_interval), fleet.slots)
+    knob1.flush(); knob2.flush()
     return []
 
+def create_transport(name):
+    if name=="fake":
+        from ble_fake import FakeTransport, FakePeripheral
+        rate = float(os.environ.get("DRONE_FAKE_RATE","100"))
+        count = int(os.environ.get("DRONE_FAKE_COUNT","1"))
+        return FakeTransport([FakePeripheral(name=f"Fake Controller {i+1}", address=f"FA:KE:00:00:00:{i+1:02X}",
+                                             rate_hz=rate, seed=i) for i in range(count)])
+    return None  # BLEService defaults to bleak
+
+fleet.spawn(0, *slot_start(0))
+bt_service = BLEService(NOTIFY_UUID, notification_handler,
+                        on_devices=on_bt_devices,
+                        on_connected=on_bt_connected,
+                        on_disconnected=on_bt_disconnected,
+                        transport=create_transport(bt_transport_name),
+                        cache=DeviceCache(bt_cache_path),
+                        max_connections=max_drones)
+dropdown.set_items([d["name"] for d in bt_service.devices])
+latency_text = fig.text(0.70,0.80,'',family='monospace',fontsize=7,va='top',visible=False)
+
+def on_draw(event):
+    global latency_overlay_updated
+    t = time.perf_counter()
+    if frame_marks['physics'] is None:
+        return
+    latency.record('physics_to_present', t-frame_marks['physics'])
+    if frame_marks['input'] is not None:
+        latency.record('input_to_photon', t-frame_marks['input'])
+    if frame_marks['presented'] is not None:
+        latency.record('frame_time', t-frame_marks['presented'])
+    frame_marks.update(physics=None, input=None, presented=t)
+    if latency_text.get_visible() and t-latency_overlay_updated>latency_overlay_period:
+        latency_text.set_text(latency.overlay_text())
+        latency_overlay_updated = t
+
+def on_latency_key(event):
+    if event.key=='t':
+        latency_text.set_visible(not latency_text.get_visible())
+        latency_text.set_text(latency.overlay_text())
+    elif event.key=='d':
+        path = latency.dump(f"latency_{int(time.time())}.json",
+                            extra={'dropped_samples': sum(r.dropped for r in list(bt_rings.values())),
+                                   'physics_hz': physics_hz})
+        print(f"Latency session written to {path}")
+
+fig.canvas.mpl_connect('draw_event', on_draw)
+fig.canvas.mpl_connect('key_press_event', on_latency_key)
 ani = FuncAnimation(fig, update, interval=50)
-threading.Thread(target=thread_scan_devices,daemon=True).start()
+bt_service.quick_start()
 fig.canvas.mpl_connect('close_event', lambda e: (cleanup_resources(), sys.exit(0)))
 fig.canvas.mpl_connect('key_press_event', lambda e: plt.close(fig) if e.key=='escape' else None)
 
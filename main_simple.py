@@ -3,6 +3,12 @@ import sys
 import io
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
+import glob
+import importlib
+import json
+import os
+import time
+
 print("Miniconda environment test successful!")
 print("Python version information:")
 import sys
@@ -10,25 +16,53 @@ print(f"Python version: {sys.version}")
 import platform
 print(f"System platform: {platform.platform()}")
 
+# Import timing: each module is timed on top of the ones imported before it,
+# so the entries add up to the cold-start cost of the entry points.
+# Pass a file name (python main_simple.py import_times.json) to save them.
+import_times = {}
+
+def timed_import(name):
+    start = time.perf_counter()
+    try:
+        return importlib.import_module(name)
+    finally:
+        import_times[name] = time.perf_counter() - start
+
+# Fonts requested by main.py's rcParams
+FONT_FAMILIES = ['Arial', 'DejaVu Sans', 'Liberation Sans']
+
+def prewarm_font_cache():
+    """Build matplotlib's font cache now instead of on the first plot."""
+    import matplotlib
+    cached = glob.glob(os.path.join(matplotlib.get_cachedir(), "fontlist-*.json"))
+    font_manager = timed_import("matplotlib.font_manager")
+    available = {f.name for f in font_manager.fontManager.ttflist}
+    state = "found" if cached else "built"
+    print(f"Font cache {state} in {import_times['matplotlib.font_manager']:.2f}s "
+          f"({len(font_manager.fontManager.ttflist)} fonts, {matplotlib.get_cachedir()})")
+    for family in FONT_FAMILIES:
+        print(f"  {family}: {'available' if family in available else 'missing'}")
+
 # Try to import common libraries
 try:
-    import numpy as np
+    np = timed_import("numpy")
     print(f"NumPy version: {np.__version__}")
 except ImportError:
     print("NumPy is not installed")
 
 try:
-    import pandas as pd
+    pd = timed_import("pandas")
     print(f"Pandas version: {pd.__version__}")
 except ImportError:
     print("Pandas is not installed")
 
 try:
-    import matplotlib
+    matplotlib = timed_import("matplotlib")
     print(f"Matplotlib version: {matplotlib.__version__}")
-    
+    prewarm_font_cache()
+
     # Create a simple plot
-    import matplotlib.pyplot as plt
+    plt = timed_import("matplotlib.pyplot")
     plt.figure(figsize=(6, 4))
     x = np.linspace(0, 10, 100)
     y = np.sin(x)
@@ -38,11 +72,17 @@ try:
     plt.ylabel("sin(x)")
     plt.savefig("test_plot.png")  # Save instead of display for CI environments
     print("Successfully created a test plot: test_plot.png")
+    timed_import("mpl_toolkits.mplot3d")
 except ImportError:
     print("Matplotlib is not installed")
 
 try:
-    import bleak
+    timed_import("matplotlib.backends.backend_tkagg")
+except ImportError:
+    print("Tk backend is not available")
+
+try:
+    bleak = timed_import("bleak")
     # Bleak does not have __version__ attribute, use alternative method
     import importlib.metadata
     try:
@@ -51,4 +91,15 @@ try:
     except:
         print("Bleak is installed but version could not be determined")
 except ImportError:
-    print("Bleak is not installed") 
\ No newline at end of file
+    print("Bleak is not installed")
+
+print("Import times:")
+for name, seconds in import_times.items():
+    print(f"  {name:<36}{seconds*1000:9.1f} ms")
+print(f"  {'total':<36}{sum(import_times.values())*1000:9.1f} ms")
+
+if len(sys.argv) > 1:
+    with open(sys.argv[1], 'w') as f:
+        json.dump({'python': sys.version.split()[0], 'platform': platform.platform(),
+                   'import_times_ms': {k: v*1000 for k, v in import_times.items()}}, f, indent=2)
+    print(f"Import times written to {sys.argv[1]}")
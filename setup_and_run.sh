@@ -9,6 +9,59 @@ if [[ "$1" == "simple" ]]; then
     USE_SIMPLE=1
 fi
 
+ENV_NAME="pydrone_balloon_log_analyze"
+ENV_DIR="$HOME/miniconda3/envs/$ENV_NAME"
+# Written after a successful setup; holds the environment fingerprint.
+# It lives inside the environment, so removing the environment invalidates it.
+STAMP_FILE="$ENV_DIR/.setup_stamp"
+# Wheels downloaded once and reused when the environment is rebuilt
+WHEEL_DIR="$HOME/.pydrone/wheels"
+
+# Fingerprint of requirements.txt plus the environment's interpreter version
+env_fingerprint() {
+    {
+        if [ -f requirements.txt ]; then cat requirements.txt; else echo "numpy pandas matplotlib bleak"; fi
+        "$ENV_DIR/bin/python" --version 2>&1
+        uname -m
+    } | if command -v shasum >/dev/null 2>&1; then shasum -a 256; else sha256sum; fi | cut -d' ' -f1
+}
+
+run_main_script() {
+    # Select script to run based on stored variable
+    MAIN_SCRIPT="main.py"
+    if [ $USE_SIMPLE -eq 1 ]; then
+        MAIN_SCRIPT="main_simple.py"
+    fi
+
+    if [ ! -f "$MAIN_SCRIPT" ] && [ -f "main_simple.py" ]; then
+        MAIN_SCRIPT="main_simple.py"
+        echo "Using main_simple.py instead..."
+    fi
+
+    # Run Python script
+    echo "Running Python script: $MAIN_SCRIPT"
+    if [ -f "$MAIN_SCRIPT" ]; then
+        python "$MAIN_SCRIPT"
+    else
+        echo "No Python script found. Please create main.py or main_simple.py"
+        exit 1
+    fi
+
+    echo "Script execution completed."
+}
+
+# Fast path: the environment is already set up for these requirements, so skip
+# conda and pip entirely (DRONE_FORCE_SETUP=1 always runs the full setup)
+if [ "$DRONE_FORCE_SETUP" != "1" ] && [ -x "$ENV_DIR/bin/python" ] && [ -f "$STAMP_FILE" ] \
+   && [ "$(cat "$STAMP_FILE")" == "$(env_fingerprint)" ]; then
+    echo "Environment $ENV_NAME is up to date, skipping setup."
+    export PATH="$ENV_DIR/bin:$PATH"
+    run_main_script
+    exit 0
+fi
+# Full setup: drop any old stamp so an interrupted or failed setup is never skipped
+rm -f "$STAMP_FILE"
+
 echo "Checking if Miniconda is installed..."
 
 # Check if Miniconda is already installed
@@ -90,32 +143,36 @@ echo "Environment is ready!"
 
 # Install dependencies
 echo "Installing dependencies..."
+INSTALL_OK=0
 if [ -f requirements.txt ]; then
-    pip install -r requirements.txt
-    echo "Dependencies installed successfully."
+    # Install from the local wheel cache when it has everything (works offline),
+    # otherwise fill the cache first; plain pip install is the last resort
+    mkdir -p "$WHEEL_DIR"
+    if pip install -q --no-index --find-links "$WHEEL_DIR" -r requirements.txt 2>/dev/null; then
+        echo "Installed from wheel cache: $WHEEL_DIR"
+        INSTALL_OK=1
+    elif pip download -q -r requirements.txt -d "$WHEEL_DIR" \
+         && pip install --no-index --find-links "$WHEEL_DIR" -r requirements.txt; then
+        echo "Wheel cache updated: $WHEEL_DIR"
+        INSTALL_OK=1
+    elif pip install -r requirements.txt; then
+        INSTALL_OK=1
+    fi
 else
     echo "requirements.txt file not found, installing basic dependencies..."
-    pip install numpy pandas matplotlib bleak
-fi
-
-# Select script to run based on stored variable
-MAIN_SCRIPT="main.py"
-if [ $USE_SIMPLE -eq 1 ]; then
-    MAIN_SCRIPT="main_simple.py"
+    if pip install numpy pandas matplotlib bleak; then
+        INSTALL_OK=1
+    fi
 fi
-
-if [ ! -f "$MAIN_SCRIPT" ] && [ -f "main_simple.py" ]; then
-    MAIN_SCRIPT="main_simple.py"
-    echo "Using main_simple.py instead..."
+if [ $INSTALL_OK -ne 1 ]; then
+    echo "Failed to install dependencies."
+    exit 1
 fi
+echo "Dependencies installed successfully."
 
-# Run Python script
-echo "Running Python script: $MAIN_SCRIPT"
-if [ -f "$MAIN_SCRIPT" ]; then
-    python "$MAIN_SCRIPT"
-else
-    echo "No Python script found. Please create main.py or main_simple.py"
-    exit 1
+# Remember this setup so the next launch can skip it
+if [ -x "$ENV_DIR/bin/python" ]; then
+    env_fingerprint > "$STAMP_FILE"
 fi
 
-echo "Script execution completed." 
\ No newline at end of file
+run_main_script
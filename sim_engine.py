@@ -0,0 +1,400 @@
+import csv
+import glob
+import os
+import sys
+import time
+import numpy as np
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Simulation & control parameters shared by the live simulator (main1.py) and
+# the headless engine.  Any value may also be an array of shape (B,) to sweep
+# a parameter across a batch.
+DEFAULT_PARAMS = {
+    'physics_hz': 20,         # physics steps per wall-clock second in the live game
+    'time_scale': 2.0,        # simulated seconds per wall-clock second
+    'L': 2.0,
+    'drone_body_radius': 1.5,
+    'rotor_radius': 1.2,
+    'base_speed': 10,
+    'yaw_adjust_factor': 0.2,
+    'k_p': 0.3, 'k_r': 0.3,
+    'z_pitch': 0.5, 'z_roll': 0.5,
+}
+
+# Game arena: targets are placed inside the x/y limits (minus a margin) and
+# between z_range; every game starts from START
+ARENA = {'xlim': (-10.0, 10.0), 'ylim': (-10.0, 10.0), 'zlim': (-1.0, 10.0),
+         'margin': 1.0, 'z_range': (1.0, 5.0)}
+START = (0.0, 0.0, 2.5)
+
+# Motors in the body frame: (offset, propeller type, spin direction)
+_d = DEFAULT_PARAMS['L']/np.sqrt(2)
+motors = [(( _d,  _d),'A',1),
+          (( _d, -_d),'B',-1),
+          ((-_d, -_d),'A',1),
+          ((-_d,  _d),'B',-1)]
+MOTOR_XY   = np.array([xy for xy,_,_ in motors])                       # (4,2)
+MOTOR_PROP = np.array([1.0 if prop=='A' else -1.0 for _,prop,_ in motors])
+MOTOR_SPIN = np.array([float(spin) for _,_,spin in motors])
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Vectorized physics
+def physics_dt(params=DEFAULT_PARAMS):
+    """Simulated seconds per physics step.
+
+    Derived from the step rate, so flight speed does not change with physics_hz.
+    """
+    return params['time_scale']/params['physics_hz']
+
+def step_dynamics(x, y, z, yaw, rotor_angle, k1x, k1y, k2x, k2y, params=DEFAULT_PARAMS):
+    """One physics step for scalars or (B,) arrays.
+
+    Knob 1 is thrust (y) and yaw (x); knob 2 is pitch (y) and roll (x), applied
+    in the drone's frame.  Returns (x, y, z, yaw, rotor_angle, rotor_speed).
+    """
+    dt, base_speed = physics_dt(params), params['base_speed']
+    k1y = np.asarray(k1y, dtype=float)
+    rs = base_speed*np.where(k1y>=0, 1+k1y, 1+0.5*k1y)
+    rotor_angle = rotor_angle + rs*dt
+    z = z + (rs/base_speed-1)*4*dt
+    yaw = yaw + (-np.asarray(k1x)*(np.pi/8))*dt
+    dx,dy = 2*np.asarray(k2x)*dt, 2*k2y*dt
+    c,s = np.cos(yaw), np.sin(yaw)
+    return x + c*dx - s*dy, y + s*dx + c*dy, z, yaw, rotor_angle, rs
+
+def rotor_speed_factors(k1x, k2x, k2y, params=DEFAULT_PARAMS):
+    """Relative speed of each rotor, shape (B,4), from the yaw and tilt inputs."""
+    k1x,k2x,k2y = (np.reshape(np.asarray(v,dtype=float),(-1,1)) for v in (k1x,k2x,k2y))
+    # Projections on the drone's forward/right axes are rotation invariant
+    fwd,rt = MOTOR_XY[:,1]/params['L'], MOTOR_XY[:,0]/params['L']
+    sf_yaw = 1-2*k1x*np.reshape(params['yaw_adjust_factor'],(-1,1))*MOTOR_PROP
+    tilt = 1-2*np.reshape(params['k_p'],(-1,1))*k2y*fwd-2*np.reshape(params['k_r'],(-1,1))*k2x*rt
+    return sf_yaw*tilt
+
+def clip_knobs(inputs):
+    """Clamp (…,4) inputs so each stick stays inside the unit circle, like Knob."""
+    inputs = np.array(inputs, dtype=float)
+    sticks = inputs.reshape(inputs.shape[:-1]+(2,2))
+    r = np.hypot(sticks[...,0], sticks[...,1])
+    sticks /= np.maximum(r, 1.0)[...,None]
+    return inputs
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Live drones
+class Fleet:
+    """Drones of the live game held as a structure of arrays.
+
+    `state` has one row per field (x, y, z, yaw, rotor_angle) and one column
+    per slot; `prev` is the state before the last step, for interpolation.
+    Slots are preallocated up to `capacity` and `active` marks the ones in
+    play.  `inputs` holds each slot's (knob1 x, knob1 y, knob2 x, knob2 y)
+    for the next step.
+    """
+
+    FIELDS = ('x', 'y', 'z', 'yaw', 'rotor_angle')
+
+    def __init__(self, capacity=4, params=None):
+        self.capacity = capacity
+        self.params = DEFAULT_PARAMS if params is None else params
+        self.state = np.zeros((len(self.FIELDS), capacity))
+        self.prev = np.zeros_like(self.state)
+        self.rotor_speed = np.zeros(capacity)
+        self.inputs = np.zeros((capacity, 4))
+        self.active = np.zeros(capacity, dtype=bool)
+
+    x = property(lambda self: self.state[0])
+    y = property(lambda self: self.state[1])
+    z = property(lambda self: self.state[2])
+    yaw = property(lambda self: self.state[3])
+    rotor_angle = property(lambda self: self.state[4])
+
+    @property
+    def slots(self):
+        return np.flatnonzero(self.active)
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def spawn(self, slot, x, y, z, yaw=0.0):
+        """Place a drone in slot (replacing any drone already there)."""
+        self.state[:,slot] = (x, y, z, yaw, 0.0)
+        self.prev[:,slot] = self.state[:,slot]
+        self.inputs[slot] = 0.0
+        self.rotor_speed[slot] = 0.0
+        self.active[slot] = True
+
+    def remove(self, slot):
+        self.active[slot] = False
+        self.inputs[slot] = 0.0
+
+    def step(self):
+        """Advance every active drone by one physics step; returns their slots."""
+        idx = self.slots
+        self.prev[:] = self.state
+        k1x,k1y,k2x,k2y = self.inputs[idx].T
+        *state, self.rotor_speed[idx] = step_dynamics(*self.state[:,idx], k1x, k1y, k2x, k2y, self.params)
+        self.state[:,idx] = state
+        return idx
+
+    def view(self, alpha):
+        """State interpolated between the last two steps, shape (5, capacity)."""
+        return self.prev + (self.state-self.prev)*alpha
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Targets
+def place_targets(rng, shape, reach, xlim=None, ylim=None, avoid=START):
+    """Uniform targets of the given leading shape, none within reach of avoid.
+
+    avoid is one point or a (K,3) array of points.  Placement is done in
+    bulk: only the rejected points are redrawn.
+    """
+    xlim = xlim or ARENA['xlim']; ylim = ylim or ARENA['ylim']
+    m = ARENA['margin']
+    lo = np.array([xlim[0]+m, ylim[0]+m, ARENA['z_range'][0]])
+    hi = np.array([xlim[1]-m, ylim[1]-m, ARENA['z_range'][1]])
+    avoid = np.reshape(np.asarray(avoid, dtype=float), (-1, 3))
+    too_close = lambda p: (np.linalg.norm(p[...,None,:]-avoid, axis=-1) <= reach).any(axis=-1)
+    pts = rng.uniform(lo, hi, tuple(np.atleast_1d(shape))+(3,))
+    bad = too_close(pts)
+    while bad.any():
+        pts[bad] = rng.uniform(lo, hi, (int(bad.sum()), 3))
+        bad = too_close(pts)
+    return pts
+
+class TargetGrid:
+    """Uniform-grid index over a fixed set of 3D targets with removal.
+
+    Points are bucketed into cubic cells of `cell_size` and stored sorted by
+    cell key, so a radius query only measures the points in the cells that
+    overlap the query sphere.
+    """
+
+    def __init__(self, points, cell_size):
+        self.points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.cell_size = float(cell_size)
+        self.alive = np.ones(len(self.points), dtype=bool)
+        cells = np.floor(self.points/self.cell_size).astype(np.int64)
+        self.origin = cells.min(axis=0) if len(cells) else np.zeros(3, dtype=np.int64)
+        self.shape = (cells.max(axis=0)-self.origin+1) if len(cells) else np.ones(3, dtype=np.int64)
+        keys = np.ravel_multi_index(tuple((cells-self.origin).T), self.shape) if len(cells) else cells[:,0]
+        self.order = np.argsort(keys, kind='stable')
+        self.sorted_keys = keys[self.order]
+
+    def __len__(self):
+        return int(self.alive.sum())
+
+    def query(self, center, radius):
+        """Indices of alive points within radius of center."""
+        center = np.asarray(center, dtype=float)
+        lo = np.maximum(np.floor((center-radius)/self.cell_size).astype(np.int64)-self.origin, 0)
+        hi = np.minimum(np.floor((center+radius)/self.cell_size).astype(np.int64)-self.origin, self.shape-1)
+        if (lo > hi).any() or not len(self.points):
+            return np.zeros(0, dtype=np.int64)
+        cx, cy, cz = np.meshgrid(*(np.arange(a, b+1) for a, b in zip(lo, hi)), indexing='ij')
+        keys = np.ravel_multi_index((cx.ravel(), cy.ravel(), cz.ravel()), self.shape)
+        starts = np.searchsorted(self.sorted_keys, keys, side='left')
+        ends = np.searchsorted(self.sorted_keys, keys, side='right')
+        cand = np.concatenate([self.order[a:b] for a, b in zip(starts, ends)])
+        cand = cand[self.alive[cand]]
+        d2 = ((self.points[cand]-center)**2).sum(axis=1)
+        return cand[d2 < radius*radius]
+
+    def remove(self, idx):
+        self.alive[idx] = False
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Headless game
+class BatchSim:
+    """B independent target-collection games stepped together.
+
+    Drone state is held as arrays of shape (B,), targets as (B,T,3) with an
+    `alive` mask.  step() takes inputs of shape (B,4) ordered
+    (knob1 x, knob1 y, knob2 x, knob2 y).
+
+    k_p, k_r and yaw_adjust_factor do not change the flight path; they set
+    how the four rotors share the load, which shows up in `rotor_speeds`
+    (B,4) and in the peak_rotor_speed result.
+    """
+
+    def __init__(self, batch=1, n_targets=3, seed=None, params=None, difficult=False):
+        self.batch = batch
+        self.n_targets = n_targets
+        self.difficult = difficult
+        self.params = dict(DEFAULT_PARAMS, **(params or {}))
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        B = self.batch
+        self.x = np.full(B, START[0]); self.y = np.full(B, START[1]); self.z = np.full(B, START[2])
+        self.yaw = (self.rng.uniform(np.pi/2, 3*np.pi/2, B) if self.difficult else np.zeros(B))
+        self.rotor_angle = np.zeros(B)
+        self.rotor_speed = np.broadcast_to(np.asarray(self.params['base_speed'], float), (B,)).copy()
+        self.rotor_speeds = np.repeat(self.rotor_speed[:,None], 4, axis=1)
+        self.peak_rotor_speed = self.rotor_speed.copy()
+        self.steps = 0
+        self.targets = place_targets(self.rng, (B, self.n_targets), self.params['drone_body_radius'])
+        self.alive = np.ones((B, self.n_targets), dtype=bool)
+        self.collected_step = np.full((B, self.n_targets), -1)
+        self.finish_step = np.full(B, -1)
+
+    @property
+    def position(self):
+        return np.stack([self.x, self.y, self.z], axis=-1)
+
+    @property
+    def done(self):
+        return self.finish_step >= 0
+
+    def step(self, inputs):
+        """Advance every game by one physics step; returns the (B,T) hit mask."""
+        inputs = np.broadcast_to(np.asarray(inputs, dtype=float), (self.batch, 4))
+        k1x,k1y,k2x,k2y = inputs.T
+        (self.x, self.y, self.z, self.yaw,
+         self.rotor_angle, self.rotor_speed) = step_dynamics(self.x, self.y, self.z, self.yaw,
+                                                             self.rotor_angle, k1x, k1y, k2x, k2y,
+                                                             self.params)
+        self.rotor_speeds = rotor_speed_factors(k1x, k2x, k2y, self.params)*np.reshape(self.rotor_speed, (-1,1))
+        running = ~self.done
+        self.peak_rotor_speed[running] = np.maximum(self.peak_rotor_speed, self.rotor_speeds.max(axis=1))[running]
+        self.steps += 1
+        if not self.n_targets:
+            return np.zeros((self.batch, 0), dtype=bool)
+        d2 = ((self.targets-self.position[:,None,:])**2).sum(-1)
+        reach = np.reshape(self.params['drone_body_radius'], (-1,1))
+        hit = self.alive & (d2 < reach**2)
+        self.collected_step[hit] = self.steps
+        self.alive &= ~hit
+        finished = ~self.alive.any(axis=1) & (self.finish_step < 0)
+        self.finish_step[finished] = self.steps
+        return hit
+
+    def run(self, policy, max_steps=2000):
+        """Step with inputs = policy(self) until every game is finished."""
+        while self.steps < max_steps and not self.done.all():
+            self.step(policy(self))
+        return self.results()
+
+    def results(self):
+        """Finish time per game in live-game seconds (NaN if unfinished) and
+        the fastest any rotor spun before finishing."""
+        finish = np.where(self.done, self.finish_step/self.params['physics_hz'], np.nan)
+        return {'finish_time': finish,
+                'finished': self.done.copy(),
+                'collected': (~self.alive).sum(axis=1),
+                'peak_rotor_speed': self.peak_rotor_speed.copy()}
+
+def pursuit_policy(sim, gain=1.0):
+    """Simple autopilot: fly straight at the nearest remaining target."""
+    pos = sim.position
+    d2 = np.where(sim.alive, ((sim.targets-pos[:,None,:])**2).sum(-1), np.inf)
+    nearest = np.argmin(d2, axis=1)
+    goal = sim.targets[np.arange(sim.batch), nearest]
+    rel = goal-pos
+    # World-frame offset into the drone frame (knob 2 steers in the drone frame)
+    c,s = np.cos(sim.yaw), np.sin(sim.yaw)
+    right = c*rel[:,0] + s*rel[:,1]
+    fwd = -s*rel[:,0] + c*rel[:,1]
+    inputs = np.zeros((sim.batch, 4))
+    inputs[:,1] = np.clip(gain*rel[:,2], -1, 1)
+    inputs[:,2] = gain*right
+    inputs[:,3] = gain*fwd
+    inputs[sim.done] = 0.0
+    return clip_knobs(inputs)
+
+def run_games(n_games=1000, seed=0, policy=pursuit_policy, max_steps=2000, **kwargs):
+    """Play n_games seeded games in one batch and return BatchSim.results()."""
+    return BatchSim(batch=n_games, seed=seed, **kwargs).run(policy, max_steps)
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Replay of recorded input streams
+INPUT_COLUMNS = ('knob1_x', 'knob1_y', 'knob2_x', 'knob2_y')
+
+def load_inputs(path):
+    """Read time and knob inputs from log_<ts>.csv file(s) written by the simulator.
+
+    path may be a single file or a directory of log_*.csv files.  Returns
+    (times (N,), inputs (N,4), recorded (N,4) x/y/z/yaw or None).
+    """
+    if os.path.isdir(path):
+        files = glob.glob(os.path.join(path, "log_*.csv"))
+        files.sort(key=lambda f: int(os.path.basename(f).split('_')[-1].split('.')[0]))
+    else:
+        files = [path]
+    rows = []
+    for name in files:
+        with open(name, newline='') as f:
+            rows.extend(csv.DictReader(f))
+    times = np.array([float(r['time']) for r in rows])
+    inputs = np.array([[float(r[c]) for c in INPUT_COLUMNS] for r in rows]).reshape(-1, 4)
+    recorded = None
+    if rows and all(c in rows[0] for c in ('x', 'y', 'z', 'yaw')):
+        recorded = np.array([[float(r[c]) for c in ('x', 'y', 'z', 'yaw')] for r in rows])
+    return times, inputs, recorded
+
+def split_sessions(times, max_gap=0.5):
+    """Slices of consecutive rows that belong to one recording.
+
+    A new session starts where time goes backwards or jumps by more than
+    max_gap seconds (a new recording, or a stall the live loop skipped).
+    """
+    times = np.asarray(times, dtype=float)
+    breaks = np.flatnonzero((np.diff(times) < 0) | (np.diff(times) > max_gap)) + 1
+    edges = [0] + breaks.tolist() + [len(times)]
+    return [slice(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+def replay(times, inputs, batch=1, seed=None, n_targets=0, params=None, difficult=False, start=None):
+    """Drive BatchSim with a recorded input stream, as fast as numpy allows.
+
+    Each recorded row is one physics step of the live game, so the replay
+    steps once per row.  times must belong to one session (see
+    split_sessions); a ValueError is raised if it goes backwards.  All batch
+    members get the same inputs, which makes (B,) parameter arrays a sweep.
+    start optionally sets the initial (x, y, z, yaw).  Returns
+    (sim, trajectory) with trajectory (steps, B, 8) holding x/y/z/yaw and
+    the four rotor speeds.
+    """
+    back = np.flatnonzero(np.diff(times) < 0)
+    if len(back):
+        raise ValueError(f"Time goes backwards at row {back[0]+1}; replay each session "
+                         f"separately (split_sessions)")
+    sim = BatchSim(batch=batch, n_targets=n_targets, seed=seed, params=params, difficult=difficult)
+    if start is not None:
+        sim.x[:], sim.y[:], sim.z[:], sim.yaw[:] = start
+    trajectory = np.empty((len(inputs), batch, 8))
+    for k in range(len(inputs)):
+        sim.step(inputs[k])
+        trajectory[k,:,:4] = np.stack([sim.x, sim.y, sim.z, sim.yaw], axis=-1)
+        trajectory[k,:,4:] = sim.rotor_speeds
+    return sim, trajectory
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Replay each recorded session and compare with what was recorded
+        times, inputs, recorded = load_inputs(sys.argv[1])
+        sessions = split_sessions(times)
+        t0 = time.perf_counter()
+        steps, span, err = 0, 0.0, np.zeros(4)
+        for rows in sessions:
+            t, u = times[rows], inputs[rows]
+            if recorded is not None and len(t) > 1:
+                # Start from the session's first recorded state and replay the steps after it
+                rec = recorded[rows]
+                sim, trajectory = replay(t[1:], u[1:], start=rec[0])
+                err = np.maximum(err, np.abs(trajectory[:,0,:4]-rec[1:]).max(axis=0))
+            else:
+                sim, trajectory = replay(t, u)
+            steps += len(trajectory)
+            span += t[-1]-t[0]
+        wall = time.perf_counter()-t0
+        print(f"Replayed {steps} steps in {len(sessions)} session(s) ({span:.1f}s of input) in "
+              f"{wall*1000:.1f} ms ({span/max(wall, 1e-9):.0f}x real time)")
+        if recorded is not None and steps:
+            print(f"Max deviation from recording: x={err[0]:.4f} y={err[1]:.4f} z={err[2]:.4f} yaw={err[3]:.4f}")
+    else:
+        t0 = time.perf_counter()
+        res = run_games(n_games=2000, seed=0)
+        wall = time.perf_counter()-t0
+        finish = res['finish_time'][res['finished']]
+        print(f"2000 seeded games in {wall:.2f}s: {res['finished'].mean()*100:.1f}% finished, "
+              f"finish time median {np.median(finish):.2f}s, p95 {np.percentile(finish, 95):.2f}s")
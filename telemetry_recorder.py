@@ -0,0 +1,140 @@
+import csv
+import glob
+import os
+import queue
+import threading
+import time
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Simulator telemetry in the log_<timestamp>.csv layout read by main.py
+LOG_COLUMNS = ['time', 'knob1_x', 'knob1_y', 'knob2_x', 'knob2_y',
+               'x', 'y', 'z', 'yaw', 'rotor_speed', 'event', 'targets_left']
+
+# Numeric event codes so the column can be plotted like any other attribute
+EVENT_NONE = 0
+EVENT_GAME_START = 1
+EVENT_TARGET_COLLECTED = 2
+EVENT_GAME_COMPLETE = 3
+
+# Seconds left between the end of one recording and the start of the next in
+# the same directory, so combined logs keep increasing time values
+SESSION_GAP = 1.0
+
+class TelemetryRecorder:
+    """Writes telemetry rows to log_<timestamp>.csv files on a background thread.
+
+    record() only appends to an unbounded queue, so the animation loop never
+    waits on disk.  The writer thread batches rows, flushes every
+    `flush_interval` seconds and starts a new file every `rotate_rows` rows.
+    File names use a millisecond timestamp so rotated files stay unique and
+    sort in order for DataPlotter.combine_csv_files.
+
+    The time column continues from the last row already logged in the
+    directory (plus SESSION_GAP), so sessions never overlap once combined.
+    It starts at the first recorded step rather than at start().
+    """
+
+    def __init__(self, directory='logs', rotate_rows=50000, flush_interval=0.5):
+        self.directory = directory
+        self.rotate_rows = rotate_rows
+        self.flush_interval = flush_interval
+        self.files = []
+        self.rows_written = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start = None
+        self.time_offset = 0.0
+
+    @property
+    def active(self):
+        return self._thread is not None
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        last = self._last_logged_time()
+        self.time_offset = 0.0 if last is None else last + SESSION_GAP
+        self._start = None
+        self._thread = threading.Thread(target=self._run, name="telemetry-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def elapsed(self, t=None):
+        """Log time for a perf_counter timestamp (default: now).
+
+        The first call fixes the time base: it maps to time_offset.
+        """
+        t = time.perf_counter() if t is None else t
+        if self._start is None:
+            self._start = t
+        return self.time_offset + t - self._start
+
+    def record(self, row):
+        """Queue one row (a sequence matching LOG_COLUMNS)."""
+        self._queue.put(row)
+
+    def stop(self, timeout=5.0):
+        """Flush everything queued so far and close the current file."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _last_logged_time(self):
+        """Time of the last row in the newest non-empty log of the directory."""
+        files = glob.glob(os.path.join(self.directory, "log_*.csv"))
+        files.sort(key=lambda f: int(os.path.basename(f).split('_')[-1].split('.')[0]))
+        for path in reversed(files):
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))
+                lines = f.read().decode(errors='replace').splitlines()
+            for line in reversed(lines):
+                try:
+                    return float(line.split(',')[0])
+                except ValueError:
+                    continue  # header or partial line
+        return None
+
+    def _open(self):
+        path = os.path.join(self.directory, f"log_{int(time.time() * 1000)}.csv")
+        while os.path.exists(path):
+            time.sleep(0.001)
+            path = os.path.join(self.directory, f"log_{int(time.time() * 1000)}.csv")
+        f = open(path, 'w', newline='', buffering=1 << 16)
+        writer = csv.writer(f)
+        writer.writerow(LOG_COLUMNS)
+        self.files.append(path)
+        return f, writer
+
+    def _run(self):
+        f, writer = self._open()
+        rows_in_file = 0
+        last_flush = time.monotonic()
+        running = True
+        while running:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            # Drain whatever else is already queued in one go
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for row in batch:
+                if row is None:
+                    running = False
+                    break
+                if rows_in_file >= self.rotate_rows:
+                    f.close()
+                    f, writer = self._open()
+                    rows_in_file = 0
+                writer.writerow(row)
+                rows_in_file += 1
+                self.rows_written += 1
+            if time.monotonic() - last_flush >= self.flush_interval:
+                f.flush()
+                last_flush = time.monotonic()
+        f.close()